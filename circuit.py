@@ -1,5 +1,25 @@
 from typing import Tuple, List
-from gate import Node, Gate, And
+
+import numpy as np
+
+from gate import (Node, Gate, And, X, D, D_BAR, GATE_TYPES, HAVE_NUMBA, njit,
+                  xor_cc1_xnor_cc0, _propagate_all_nb, _propagate_batch_nb,
+                  _SET_LUT, _inv_nb, _and_from_mask, _or_from_mask,
+                  _xor_nb, _xnor_nb)
+
+# optional Cython extension (cythonize -i gate_kernels.pyx); the numba /
+# pure-Python kernel from gate.py is the fallback
+try:
+    from gate_kernels import propagate_all as _c_propagate_all
+except ImportError:
+    _c_propagate_all = None
+
+# circuits above this many gates skip the jitted per-circuit codegen path:
+# numba's compile time on the one-statement-per-gate generated function grows
+# superlinearly with gate count (minutes at ISCAS scale), and the exec'd
+# source cannot use numba's on-disk cache, so the cost would recur for every
+# circuit in every process.  The generic kernels compile once and stay fast.
+_CODEGEN_MAX_GATES = 256
 
 
 class Circuit:
@@ -7,6 +27,7 @@ class Circuit:
         self.inputs = list(primary_inputs)
         self.outputs, self.gates, self.nodes = self.parse_circuit(self.inputs)
         self.gates_list = self.get_gates_list()
+        self.build_soa()
         self.set_controllability()
 
         self.fault_node = self.find_fault_node()
@@ -56,15 +77,180 @@ class Circuit:
             gates.extend(list(self.gates[depth].values()))
         return gates
 
-    def set_controllability(self):
+    def alloc_soa(self, n_nodes):
+        """
+        Allocates the flat per-node arrays: state, stuck_at (-1 = no fault) and
+        cc0/cc1 (-1 = not yet computed), all indexed by node id.  Once a node
+        is adopted by the circuit its attributes become views into these.
+        """
+        self.state = np.full(n_nodes, X, dtype=np.int8)
+        self.stuck_at = np.full(n_nodes, -1, dtype=np.int8)
+        self.cc0 = np.full(n_nodes, -1, dtype=np.int32)
+        self.cc1 = np.full(n_nodes, -1, dtype=np.int32)
+
+    def build_soa(self):
+        """
+        Builds a struct-of-arrays view of the circuit: a node id per Node, flat
+        per-node scalar arrays, and numpy arrays describing each gate (type id,
+        CSR input list, output node id) in topological (depth) order.  These
+        let whole-circuit passes like set_controllability run as array
+        operations instead of chasing Python objects per node.
+        """
+        self.alloc_soa(len(self.nodes))
+        for idx, node in enumerate(self.nodes):
+            node.id = idx
+            # copy the node's standalone scalars into the arrays, then attach
+            self.state[idx] = node._state
+            self.stuck_at[idx] = -1 if node._stuck_at is None else node._stuck_at
+            if node._cc0 is not None:
+                self.cc0[idx] = node._cc0
+            if node._cc1 is not None:
+                self.cc1[idx] = node._cc1
+            node.circuit = self
         depths = sorted(self.gates.keys())
+        ordered_gates = []
         for depth in depths:
-            for gate_name in self.gates[depth]:
-                for input in self.gates[depth][gate_name].inputs:
-                    input.set_controllability()
-        last = len(depths) - 1
-        for gate_name in self.gates[last]:
-            self.gates[last][gate_name].output.set_controllability()
+            ordered_gates.extend(self.gates[depth].values())
+        self.soa_gates = ordered_gates  # gates in topological order
+        n_gates = len(ordered_gates)
+        self.gate_type = np.empty(n_gates, dtype=np.uint8)
+        self.gate_out_idx = np.empty(n_gates, dtype=np.int32)
+        self.gate_in_ptr = np.zeros(n_gates + 1, dtype=np.int32)
+        in_idx = []
+        for gi, gate in enumerate(ordered_gates):
+            self.gate_type[gi] = gate._type_id
+            self.gate_out_idx[gi] = gate.output.id
+            gate._in_ids = np.array([inp.id for inp in gate.inputs], dtype=np.int32)
+            in_idx.extend(gate._in_ids)
+            self.gate_in_ptr[gi + 1] = len(in_idx)
+        self.gate_in_idx = np.array(in_idx, dtype=np.int32)
+        self.gate_order = np.arange(n_gates, dtype=np.int32)
+
+        # per-node depth (0 for PIs), from the depths cached on the gates
+        self.node_depth = np.zeros(len(self.nodes), dtype=np.int32)
+        for gate in ordered_gates:
+            self.node_depth[gate.output.id] = gate.depth
+
+        # fanout in CSR form: fanout_idx[fanout_ptr[n]:fanout_ptr[n+1]] are the
+        # output node ids of the gates node n feeds, plus per-node fanout
+        # counts and a PI mask so is_fanout/is_po/is_pi are single array reads
+        n_nodes = len(self.nodes)
+        self.fanout_count = np.zeros(n_nodes, dtype=np.uint16)
+        self.fanout_ptr = np.zeros(n_nodes + 1, dtype=np.int32)
+        self.pi_mask = np.zeros(n_nodes, dtype=np.bool_)
+        fanout_idx = []
+        for node in self.nodes:  # self.nodes is in id order
+            self.fanout_ptr[node.id] = len(fanout_idx)
+            fanout_idx.extend(gate.output.id for gate in node.gates)
+            self.fanout_count[node.id] = len(node.gates)
+            self.pi_mask[node.id] = node.gate_output is None
+        self.fanout_ptr[n_nodes] = len(fanout_idx)
+        self.fanout_idx = np.array(fanout_idx, dtype=np.int32)
+
+        # specialized propagate function, generated lazily by compile_propagate
+        self._compiled_propagate = None
+
+        # X-path reachability cache, recomputed lazily by refresh_x_reach
+        # whenever a node's state has changed
+        self._x_reach = np.zeros(len(self.nodes), dtype=np.bool_)
+        self._x_reach_dirty = True
+        self._reverse_topo_nodes = sorted(
+            self.nodes, key=lambda n: self.node_depth[n.id], reverse=True)
+
+        # group gates of the same type within each depth level so that
+        # controllability can be computed with segment reductions
+        self._cc_groups = []
+        for depth in depths:
+            by_type = {}
+            for gate in self.gates[depth].values():
+                by_type.setdefault(gate._type_id, []).append(gate)
+            level = []
+            for type_id, gates in by_type.items():
+                starts, gather, outs = [], [], []
+                for gate in gates:
+                    starts.append(len(gather))
+                    gather.extend(inp.id for inp in gate.inputs)
+                    outs.append(gate.output.id)
+                level.append((
+                    type_id,
+                    np.array(outs, dtype=np.int32),
+                    np.array(gather, dtype=np.int32),
+                    np.array(starts, dtype=np.int32),
+                ))
+            self._cc_groups.append(level)
+
+    def set_controllability(self):
+        """
+        Computes cc0/cc1 for every node in one topologically-ordered pass over
+        the struct-of-arrays form, using segment reductions per (depth, type)
+        group instead of calling Node.set_controllability per node.
+        """
+        cc0, cc1 = self.cc0, self.cc1
+        for node in self.inputs:
+            cc0[node.id] = 1
+            cc1[node.id] = 1
+        for level in self._cc_groups:
+            for type_id, outs, gather, starts in level:
+                gate_type = GATE_TYPES[type_id]
+                in0 = cc0[gather]
+                in1 = cc1[gather]
+                if gate_type == "not":
+                    # one input per gate, so the gathered arrays are per-gate
+                    cc0[outs] = in1 + 1
+                    cc1[outs] = in0 + 1
+                elif gate_type == "and":
+                    cc0[outs] = np.minimum.reduceat(in0, starts) + 1
+                    cc1[outs] = np.add.reduceat(in1, starts) + 1
+                elif gate_type == "nand":
+                    cc0[outs] = np.add.reduceat(in1, starts) + 1
+                    cc1[outs] = np.minimum.reduceat(in0, starts) + 1
+                elif gate_type == "or":
+                    cc0[outs] = np.add.reduceat(in0, starts) + 1
+                    cc1[outs] = np.minimum.reduceat(in1, starts) + 1
+                elif gate_type == "nor":
+                    cc0[outs] = np.minimum.reduceat(in1, starts) + 1
+                    cc1[outs] = np.add.reduceat(in0, starts) + 1
+                else:  # xor / xnor
+                    easy = np.minimum(np.add.reduceat(in0, starts),
+                                      np.add.reduceat(in1, starts)) + 1
+                    hard = np.empty(len(outs), dtype=np.int32)
+                    bounds = list(starts) + [len(gather)]
+                    for i in range(len(outs)):
+                        lo, hi = bounds[i], bounds[i + 1]
+                        hard[i] = xor_cc1_xnor_cc0(in0[lo:hi], in1[lo:hi])
+                    if gate_type == "xor":
+                        cc0[outs] = easy
+                        cc1[outs] = hard
+                    else:
+                        cc0[outs] = hard
+                        cc1[outs] = easy
+        # controllability changed, so the cached per-gate input orders are stale
+        for gate in self.gates_list:
+            gate._cc_order_cache.clear()
+
+    def refresh_x_reach(self):
+        """
+        Recomputes the X-path reachability cache: _x_reach[id] is True when the
+        node is X and an all-X path from it reaches a PO.  One reverse
+        topological pass amortizes the per-node DFS that has_x_path used to do,
+        and the dirty flag makes repeated queries between state changes free.
+        """
+        if not self._x_reach_dirty:
+            return
+        reach = self._x_reach
+        state = self.state
+        fanout_ptr, fanout_idx = self.fanout_ptr, self.fanout_idx
+        for node in self._reverse_topo_nodes:
+            nid = node.id
+            if state[nid] != X:
+                reach[nid] = False
+            else:
+                lo, hi = fanout_ptr[nid], fanout_ptr[nid + 1]
+                if lo == hi:  # PO
+                    reach[nid] = True
+                else:
+                    reach[nid] = reach[fanout_idx[lo:hi]].any()
+        self._x_reach_dirty = False
 
     def find_fault_node(self):
         faulty_nodes = []
@@ -163,7 +349,9 @@ class Circuit:
     def set_inputs(self, inputs):
         assert len(inputs) == len(self.inputs)
         for idx in range(len(self.inputs)):
-            self.inputs[idx].state = inputs[idx]
+            node = self.inputs[idx]
+            node.state = inputs[idx]
+            node._touch()
 
     def get_outputs(self):
         outputs = []
@@ -171,22 +359,154 @@ class Circuit:
             outputs.append(node.state)
         return outputs
 
+    def compile_propagate(self):
+        """
+        Emits (via exec) a propagate function specialized to this circuit: one
+        straight-line statement per gate, with the truth-table lookup and the
+        input/output node ids written out as literals.  All the per-gate
+        dispatch, type branching and CSR pointer chasing of the generic kernel
+        is partially evaluated away at build time; what remains is a flat
+        sequence of array reads and writes that numba (when installed) can
+        compile as a single function.  The stuck-at translation stays
+        data-driven through _SET_LUT, so the compiled function remains valid
+        as faults are moved between ATPG runs.
+
+        The njit wrap is only applied below _CODEGEN_MAX_GATES; on larger
+        circuits numba's compile time on the generated function dwarfs any
+        run-time win, so they keep the plain exec'd version (still free of
+        per-gate dispatch) and propagate_all prefers a generic kernel.
+        """
+        namespace = {
+            "_SET": _SET_LUT, "_inv_nb": _inv_nb,
+            "_and_from_mask": _and_from_mask, "_or_from_mask": _or_from_mask,
+            "_xor_nb": _xor_nb, "_xnor_nb": _xnor_nb,
+        }
+        lines = ["def _propagate(state, stuck_at):"]
+        for gate in self.soa_gates:
+            out = gate.output.id
+            ids = [int(i) for i in gate._in_ids]
+            if gate._lut is not None:
+                lut_name = f"_L{gate._type_id}_{len(ids)}"
+                namespace[lut_name] = gate._lut
+                packed = f"int(state[{ids[0]}])"
+                for i in ids[1:]:
+                    packed = f"({packed}) * 5 + int(state[{i}])"
+                expr = f"{lut_name}[{packed}]"
+            elif gate.type in ("and", "nand", "or", "nor"):
+                # too wide for a LUT: inline the bitmask evaluation instead
+                mask = " | ".join(f"(1 << int(state[{i}]))" for i in ids)
+                fn = "_and_from_mask" if gate.type in ("and", "nand") else "_or_from_mask"
+                expr = f"{fn}({mask})"
+                if gate.type in ("nand", "nor"):
+                    expr = f"_inv_nb({expr})"
+            else:  # wide xor / xnor: gather the inputs and run the parity kernel
+                in_name = f"_IN{out}"
+                namespace[in_name] = gate._in_ids
+                kernel = "_xor_nb" if gate.type == "xor" else "_xnor_nb"
+                expr = f"{kernel}(state[{in_name}])"
+            lines.append(f"    v = _SET[int(stuck_at[{out}]) + 1, {expr}]")
+            lines.append("    if v == 255:")
+            lines.append("        raise ValueError"
+                         "('Trying to assign D/~D to a faulty node')")
+            lines.append(f"    state[{out}] = v")
+        if not self.soa_gates:
+            lines.append("    pass")
+        exec("\n".join(lines), namespace)
+        compiled = namespace["_propagate"]
+        if HAVE_NUMBA and len(self.soa_gates) <= _CODEGEN_MAX_GATES:
+            compiled = njit(compiled)
+        return compiled
+
+    def propagate_all(self):
+        """
+        Propagates the whole circuit in one kernel call over the
+        struct-of-arrays form, with no per-gate Python dispatch.  Small
+        circuits use the jitted circuit-specialized function from
+        compile_propagate; above _CODEGEN_MAX_GATES (or when numba is
+        missing) the once-compiled generic kernels win — Cython when built,
+        else the numba kernel whose cache=True compilation is paid once per
+        process — with the plain exec'd specialization as the last resort.
+        Per-gate bookkeeping is resynced only for nodes whose X-ness changed.
+        """
+        x_before = self.state == X
+        codegen_jittable = HAVE_NUMBA and len(self.soa_gates) <= _CODEGEN_MAX_GATES
+        if codegen_jittable or (not HAVE_NUMBA and _c_propagate_all is None):
+            if self._compiled_propagate is None:
+                self._compiled_propagate = self.compile_propagate()
+            self._compiled_propagate(self.state, self.stuck_at)
+        elif _c_propagate_all is not None:
+            _c_propagate_all(self.state, self.stuck_at, self.gate_type,
+                             self.gate_in_ptr, self.gate_in_idx,
+                             self.gate_out_idx, self.gate_order)
+        else:
+            _propagate_all_nb(self.state, self.stuck_at, self.gate_type,
+                              self.gate_in_ptr, self.gate_in_idx,
+                              self.gate_out_idx, self.gate_order)
+        for idx in np.nonzero(x_before != (self.state == X))[0]:
+            self.nodes[idx]._sync_gate_masks()
+        self._x_reach_dirty = True
+
+    def propagate_batch(self, pi_values, pi_cares=None):
+        """
+        Simulates 64 input patterns through the circuit at once.  Each PI gets
+        a uint64 whose bit b is that PI's value in pattern b; pi_cares marks
+        which bits are assigned (bit clear = X, default all assigned).  The
+        good and the faulty circuit are propagated as bit-parallel 3-valued
+        simulations, with any stuck-at faults forced on the faulty planes.
+
+        Returns (good_v, good_c, bad_v, bad_c) uint64 arrays indexed by node
+        id; a node holds D in pattern b when both care bits are set and the
+        good/bad value bits differ.
+        """
+        assert len(pi_values) == len(self.inputs)
+        n_nodes = len(self.nodes)
+        good_v = np.zeros(n_nodes, dtype=np.uint64)
+        good_c = np.zeros(n_nodes, dtype=np.uint64)
+        all_ones = ~np.uint64(0)
+        for idx, node in enumerate(self.inputs):
+            good_v[node.id] = pi_values[idx]
+            good_c[node.id] = all_ones if pi_cares is None else pi_cares[idx]
+        bad_v = good_v.copy()
+        bad_c = good_c.copy()
+        # faults on PIs are not visited by the gate loop, force them here
+        for node in self.inputs:
+            if node.is_faulty():
+                bad_v[node.id] = np.uint64(0) if node.stuck_at == 0 else all_ones
+                bad_c[node.id] = all_ones
+        _propagate_batch_nb(good_v, good_c, bad_v, bad_c, self.stuck_at,
+                            self.gate_type, self.gate_in_ptr, self.gate_in_idx,
+                            self.gate_out_idx, self.gate_order)
+        return good_v, good_c, bad_v, bad_c
+
+    def fault_detected_batch(self, good_v, good_c, bad_v, bad_c):
+        """
+        Given planes from propagate_batch, returns a uint64 mask of which of
+        the 64 patterns propagate the fault to at least one PO.
+        """
+        detected = np.uint64(0)
+        for node in self.outputs.values():
+            detected |= (good_c[node.id] & bad_c[node.id]
+                         & (good_v[node.id] ^ bad_v[node.id]))
+        return detected
+
     def propagate(self, inputs=None, verbose=False, reset=False):
         if reset:
             self.reset()
         if inputs:
             self.set_inputs(inputs)
-        depths = sorted(self.gates.keys())
-        for depth in depths:
-            for gate_name in self.gates[depth]:
-                self.gates[depth][gate_name].propagate(verbose=verbose)
         if verbose:
+            depths = sorted(self.gates.keys())
+            for depth in depths:
+                for gate_name in self.gates[depth]:
+                    self.gates[depth][gate_name].propagate(verbose=verbose)
             print("\n\n")
+        else:
+            self.propagate_all()
         return self.get_outputs()
 
     def fault_propagated(self, verbose: bool = False):
         outputs = self.get_outputs()
-        res = "D" in outputs or "~D" in outputs
+        res = D in outputs or D_BAR in outputs
         if verbose:
             print(
                 f"Fault propagated: {'PROPAGATED TO PO!' if res else 'not propagated to PO.'}"
@@ -236,7 +556,7 @@ class Circuit:
         assert stuck_at in opposite
 
         # if gate unassigned, return opposite
-        if node_with_fault.state == "X":
+        if node_with_fault.state == X:
             if verbose:
                 print(f"Objective:\tSet {node_with_fault} to {opposite[stuck_at]}")
             return node_with_fault, opposite[stuck_at]
@@ -249,7 +569,7 @@ class Circuit:
         gate = d_frontier[0]
         # select an unassigned input to this gate
         for inp in gate.inputs:
-            if inp.state == "X":
+            if inp.state == X:
                 break
         c = 0
         if gate.control_value != -1:
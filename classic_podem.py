@@ -1,6 +1,6 @@
 from typing import Tuple
 from circuit import Circuit
-from gate import Node
+from gate import Node, X, STATE_NAMES
 
 
 class PIAssignment:
@@ -54,10 +54,10 @@ class ImplicationStack:
     def set_x(self):
         """Sets the last implied node to an X and removes from the implication stack."""
         last_implication = self.stack.pop(-1)
-        last_implication.assign("X")
+        last_implication.assign(X)
         if self.verbose:
             print(
-                f"\nImplication Stack:\tUnassigned {last_implication.node} to {last_implication.node.state}"
+                f"\nImplication Stack:\tUnassigned {last_implication.node} to {STATE_NAMES[last_implication.node.state]}"
             )
             print(f"Implication Stack:\t{self.get_assignments()}\n")
         return last_implication
@@ -1,30 +1,402 @@
+import functools
 import itertools
 from typing import TypeVar, Generic
 
+import numpy as np
+
 # needed because node and gate classes reference each other
 GateType = TypeVar("GateType")
 
+# 5-valued logic encoded as small ints so the propagate hot path works on
+# integers instead of hashing/comparing strings:
+# 0 -> logic 0, 1 -> logic 1, 2 -> X, 3 -> D, 4 -> ~D
+ZERO = 0
+ONE = 1
+X = 2
+D = 3
+D_BAR = 4
+
+# for printing states back in the old string form
+STATE_NAMES = ("0", "1", "X", "D", "~D")
+
+# inversion lookup table indexed by state code
+_INV = np.array([1, 0, 2, 4, 3], dtype=np.uint8)
+
+# set_state lookup indexed by (stuck_at + 1, assigned value): row 0 = no
+# fault (identity), row 1 = stuck at 0 (1 becomes D), row 2 = stuck at 1
+# (0 becomes ~D); 255 marks the illegal D/~D assignment to a faulty node
+_SET_LUT = np.array([
+    [0, 1, 2, 3, 4],
+    [0, 3, 2, 255, 255],
+    [4, 1, 2, 255, 255],
+], dtype=np.uint8)
+
+# 2-input XOR lookup table indexed by the two state codes
+_XOR2 = np.array([
+    [0, 1, 2, 3, 4],
+    [1, 0, 2, 4, 3],
+    [2, 2, 2, 2, 2],
+    [3, 4, 2, 0, 1],
+    [4, 3, 2, 1, 0],
+], dtype=np.uint8)
+
+# gate types in a fixed order so a type can be referred to by a small int
+GATE_TYPES = ("not", "and", "nand", "or", "nor", "xor", "xnor")
+
+# numba is optional: when it is not installed the kernels below run as
+# plain-Python functions instead of being JIT compiled
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        def wrap(func):
+            return func
+        return wrap
+
+
+@njit(cache=True)
+def _inv_nb(s):
+    if s == 0:
+        return 1
+    if s == 1:
+        return 0
+    if s == 3:
+        return 4
+    if s == 4:
+        return 3
+    return 2
+
+
+@njit(cache=True)
+def _and_from_mask(mask):
+    """AND output from a bitmask of which of {0, 1, X, D, ~D} appear."""
+    if mask & 1:                        # at least one 0
+        return 0
+    if mask == 2:                       # all 1's
+        return 1
+    if (mask >> 3) & (mask >> 4) & 1:   # both D and ~D
+        return 0
+    if mask & 4:                        # X present
+        return 2
+    if mask & 8:                        # D's (and possibly 1's)
+        return 3
+    return 4                            # ~D's (and possibly 1's)
+
+
+@njit(cache=True)
+def _or_from_mask(mask):
+    """OR output from a bitmask of which of {0, 1, X, D, ~D} appear."""
+    if mask & 2:                        # at least one 1
+        return 1
+    if mask == 1:                       # all 0's
+        return 0
+    if (mask >> 3) & (mask >> 4) & 1:   # both D and ~D
+        return 1
+    if mask & 4:                        # X present
+        return 2
+    if mask & 8:                        # D's (and possibly 0's)
+        return 3
+    return 4                            # ~D's (and possibly 0's)
+
+
+@njit(cache=True)
+def _and_nb(states):
+    mask = 0
+    for s in states:
+        mask |= 1 << s
+    return _and_from_mask(mask)
+
+
+@njit(cache=True)
+def _or_nb(states):
+    mask = 0
+    for s in states:
+        mask |= 1 << s
+    return _or_from_mask(mask)
+
+
+@njit(cache=True)
+def _not_nb(states):
+    return _inv_nb(states[0])
+
+
+@njit(cache=True)
+def _nand_nb(states):
+    return _inv_nb(_and_nb(states))
+
+
+@njit(cache=True)
+def _nor_nb(states):
+    return _inv_nb(_or_nb(states))
+
+
+@njit(cache=True)
+def _xor_nb(states):
+    # track good/bad circuit parity; any X makes the output X
+    good = 0
+    bad = 0
+    for s in states:
+        if s == 2:
+            return 2
+        if s == 1 or s == 3:
+            good ^= 1
+        if s == 1 or s == 4:
+            bad ^= 1
+    if good == bad:
+        return good
+    if good == 1:
+        return 3
+    return 4
+
+
+@njit(cache=True)
+def _xnor_nb(states):
+    return _inv_nb(_xor_nb(states))
+
+
+# kernel per gate type, indexed by position in GATE_TYPES
+_NB_KERNELS = (_not_nb, _and_nb, _nand_nb, _or_nb, _nor_nb, _xor_nb, _xnor_nb)
+
+
+@njit(cache=True)
+def _propagate_all_nb(state, stuck_at, type_ids, in_ptr, in_idx, out_idx, order):
+    """
+    Propagates every gate in topological order directly on the circuit's flat
+    arrays (see Circuit.build_soa), applying the stuck-at translation on each
+    output.  Type ids index GATE_TYPES.
+    """
+    for k in range(order.shape[0]):
+        g = order[k]
+        lo = in_ptr[g]
+        hi = in_ptr[g + 1]
+        t = type_ids[g]
+        if t == 5 or t == 6:            # xor / xnor
+            good = 0
+            bad = 0
+            v = -1
+            for i in range(lo, hi):
+                s = state[in_idx[i]]
+                if s == 2:
+                    v = 2
+                    break
+                if s == 1 or s == 3:
+                    good ^= 1
+                if s == 1 or s == 4:
+                    bad ^= 1
+            if v == -1:
+                if good == bad:
+                    v = good
+                elif good == 1:
+                    v = 3
+                else:
+                    v = 4
+            if t == 6:
+                v = _inv_nb(v)
+        elif t == 0:                    # not
+            v = _inv_nb(state[in_idx[lo]])
+        else:
+            mask = 0
+            for i in range(lo, hi):
+                mask |= 1 << state[in_idx[i]]
+            if t == 1:                  # and
+                v = _and_from_mask(mask)
+            elif t == 2:                # nand
+                v = _inv_nb(_and_from_mask(mask))
+            elif t == 3:                # or
+                v = _or_from_mask(mask)
+            else:                       # nor
+                v = _inv_nb(_or_from_mask(mask))
+        o = out_idx[g]
+        sa = stuck_at[o]
+        if sa >= 0 and (v == 3 or v == 4):
+            raise ValueError("Trying to assign D/~D to a faulty node")
+        if sa == 0 and v == 1:
+            v = 3
+        elif sa == 1 and v == 0:
+            v = 4
+        state[o] = v
+
+
+@njit(cache=True)
+def _gate_swar(v_plane, c_plane, t, in_idx, lo, hi):
+    """
+    Evaluates one gate on 64 packed patterns at once.  Each node carries a
+    value plane and a care plane (bit clear in the care plane = X); native
+    uint64 bitops evaluate all 64 patterns per gate.
+    """
+    j = in_idx[lo]
+    v = v_plane[j]
+    c = c_plane[j]
+    if t == 0:                          # not
+        return ~v, c
+    for i in range(lo + 1, hi):
+        j = in_idx[i]
+        v2 = v_plane[j]
+        c2 = c_plane[j]
+        if t == 1 or t == 2:            # and / nand: known if all known or any known 0
+            c = (c & c2) | (c & ~v) | (c2 & ~v2)
+            v = v & v2
+        elif t == 3 or t == 4:          # or / nor: known if all known or any known 1
+            c = (c & c2) | (c & v) | (c2 & v2)
+            v = v | v2
+        else:                           # xor / xnor: known only if all known
+            c = c & c2
+            v = v ^ v2
+    if t == 2 or t == 4 or t == 6:      # inverting types
+        v = ~v
+    return v, c
+
+
+@njit(cache=True)
+def _propagate_batch_nb(good_v, good_c, bad_v, bad_c, stuck_at,
+                        type_ids, in_ptr, in_idx, out_idx, order):
+    """
+    64-pattern parallel propagation: runs the good and the faulty circuit as
+    two 3-valued SWAR simulations over the flat gate arrays, forcing the bad
+    planes to the stuck value on faulty outputs.  A fault is detected in a
+    pattern where both circuits are known and their values differ.
+    """
+    all_ones = ~np.uint64(0)
+    for k in range(order.shape[0]):
+        g = order[k]
+        lo = in_ptr[g]
+        hi = in_ptr[g + 1]
+        t = type_ids[g]
+        o = out_idx[g]
+        v, c = _gate_swar(good_v, good_c, t, in_idx, lo, hi)
+        good_v[o] = v
+        good_c[o] = c
+        v, c = _gate_swar(bad_v, bad_c, t, in_idx, lo, hi)
+        sa = stuck_at[o]
+        if sa == 0:
+            v = np.uint64(0)
+            c = all_ones
+        elif sa == 1:
+            v = all_ones
+            c = all_ones
+        bad_v[o] = v
+        bad_c[o] = c
+
+
+def xor_cc1_xnor_cc0(cc0s, cc1s):
+    """
+    Gets the xor cc1 and the equivalent xnor cc0 from the input
+    controllabilities = min(all combinations with odd number of 1's) + 1
+
+    Computed with a parity DP instead of enumerating all 2^(n-1) odd
+    combinations: best_even/best_odd track the cheapest way to give an
+    even/odd number of the inputs seen so far a 1 (the rest a 0).
+    """
+    best_even = 0
+    best_odd = 1000000
+    for cc0, cc1 in zip(cc0s, cc1s):
+        best_even, best_odd = (
+            min(best_even + cc0, best_odd + cc1),
+            min(best_even + cc1, best_odd + cc0),
+        )
+    return best_odd + 1
+
+@functools.lru_cache(maxsize=None)
 def generate_name(count):
-    quot, rem = divmod(count - 1, 26)
-    return generate_name(quot) + chr(rem + ord('A')) if count != 0 else ''
+    """Base-26 name for the count-th node: 1 -> A, 26 -> Z, 27 -> AA, ..."""
+    digits = []
+    while count:
+        count, rem = divmod(count - 1, 26)
+        digits.append(chr(rem + ord('A')))
+    return ''.join(reversed(digits))
+
+
+# counters for auto-generated names; plain next() beats a dict update per
+# construction
+_node_name_counter = itertools.count(1)
+_gate_counters = {t: itertools.count(1) for t in GATE_TYPES}
 
 
 class Node:
-    name_count = 0
+    # nodes are created in huge numbers: slots cut the per-instance dict and
+    # make attribute access a fixed-offset descriptor read
+    __slots__ = ('circuit', 'id', 'gates', 'gate_output', 'name',
+                 '_state', '_stuck_at', '_cc0', '_cc1')
 
     def __init__(self, name: str=None, gate_output: GateType=None, stuck_at=None):
+        # set first: the state/stuck_at/cc properties below route through the
+        # owning Circuit's flat arrays once the node has been adopted
+        self.circuit = None
+        self.id = None
         self.stuck_at = stuck_at
-        self.state = 'X'
+        self.state = X
         self.gates = []  # gates for which this node is an input
         self.gate_output = gate_output  # gate for which this node is an output, None for PI
         if name is not None:
             self.name = name
         else:
-            Node.name_count += 1
-            self.name = generate_name(self.name_count)
+            self.name = generate_name(next(_node_name_counter))
         self.cc0 = None
         self.cc1 = None
 
+    # The hot scalars (state, stuck_at, cc0, cc1) live in contiguous numpy
+    # arrays on the Circuit once the node is attached; the properties below
+    # make the Node a thin view over those arrays.  Detached nodes fall back
+    # to plain per-instance storage.
+
+    @property
+    def state(self):
+        if self.circuit is not None:
+            return int(self.circuit.state[self.id])
+        return self._state
+
+    @state.setter
+    def state(self, val):
+        if self.circuit is not None:
+            self.circuit.state[self.id] = val
+        else:
+            self._state = val
+
+    @property
+    def stuck_at(self):
+        if self.circuit is not None:
+            val = int(self.circuit.stuck_at[self.id])
+            return None if val == -1 else val
+        return self._stuck_at
+
+    @stuck_at.setter
+    def stuck_at(self, val):
+        if self.circuit is not None:
+            self.circuit.stuck_at[self.id] = -1 if val is None else val
+        else:
+            self._stuck_at = val
+
+    @property
+    def cc0(self):
+        if self.circuit is not None:
+            val = int(self.circuit.cc0[self.id])
+            return None if val < 0 else val
+        return self._cc0
+
+    @cc0.setter
+    def cc0(self, val):
+        if self.circuit is not None:
+            self.circuit.cc0[self.id] = -1 if val is None else val
+        else:
+            self._cc0 = val
+
+    @property
+    def cc1(self):
+        if self.circuit is not None:
+            val = int(self.circuit.cc1[self.id])
+            return None if val < 0 else val
+        return self._cc1
+
+    @cc1.setter
+    def cc1(self, val):
+        if self.circuit is not None:
+            self.circuit.cc1[self.id] = -1 if val is None else val
+        else:
+            self._cc1 = val
+
     def set_controllability(self):
         """Return a tuple of CC0, CC1"""
         if self.is_pi():
@@ -34,47 +406,6 @@ class Node:
         gate_type = self.gate_output.type
         gate_inputs = self.gate_output.inputs
 
-        def xor_cc1_xnor_cc0(inputs):
-            """
-            Gets the xor cc1 and the equivalent xnor cc0
-            = min(all combinations with odd number of 1's) + 1
-            """
-            def construct_odds(n):
-                """
-                Returns all combinations of n input variables with odd number of 1's.
-
-                If a number is a 1, it is included in the result, else it is not
-                included in the result and is assumed to be 0.
-
-                Returned as a list of tuples.
-
-                Examples:
-                construct_odds(2) -> [(1), (2)]
-                construct_odds(3) -> [(1), (2), (3), (1, 2, 3)]
-                construct_odds(4) -> [(1), (2), (3), (4), (1, 2, 3), (1, 2, 4), (1, 3, 4), (2, 3, 4)]
-
-                :param n: number of input variables
-                :return: a list of tuples
-                """
-                odds = [x for x in range(1, n + 1) if x % 2 == 1]
-
-                res = []
-                for odd in odds:
-                    res.extend(list(itertools.combinations(range(1, n + 1), odd)))
-                return res
-
-            min = 1000000
-            for combination in construct_odds(len(inputs)):
-                term = 0
-                for idx, input in enumerate(gate_inputs):
-                    if idx + 1 in combination:
-                        term += input.cc1
-                    else:
-                        term += input.cc0
-                if term < min:
-                    min = term
-            return min + 1
-
         if gate_type == 'not':
             cc0 = gate_inputs[0].cc1 + 1
             cc1 = gate_inputs[0].cc0 + 1
@@ -92,85 +423,130 @@ class Node:
             cc1 = sum([x.cc0 for x in gate_inputs]) + 1
         if gate_type == 'xor':
             cc0 = min([sum([x.cc0 for x in gate_inputs]), sum([x.cc1 for x in gate_inputs])]) + 1
-            cc1 = xor_cc1_xnor_cc0(gate_inputs)
+            cc1 = xor_cc1_xnor_cc0([x.cc0 for x in gate_inputs], [x.cc1 for x in gate_inputs])
         if gate_type == 'xnor':
-            cc0 = xor_cc1_xnor_cc0(gate_inputs)
+            cc0 = xor_cc1_xnor_cc0([x.cc0 for x in gate_inputs], [x.cc1 for x in gate_inputs])
             cc1 = min([sum([x.cc0 for x in gate_inputs]), sum([x.cc1 for x in gate_inputs])]) + 1
         self.cc0 = cc0
         self.cc1 = cc1
         return cc0, cc1
 
+    def _sync_gate_masks(self):
+        """Updates the unassigned-input bitmask of every gate this node feeds."""
+        unassigned = self.state == X
+        for gate in self.gates:
+            mask = gate._input_pos_mask[self]
+            if unassigned:
+                gate._unassigned_mask |= mask
+            else:
+                gate._unassigned_mask &= ~mask
+
+    def _touch(self):
+        """Updates per-gate bookkeeping and the owning circuit after a state change."""
+        self._sync_gate_masks()
+        if self.circuit is not None:
+            self.circuit._x_reach_dirty = True
+
     def set_stuck_at(self, stuck_at):
         self.stuck_at = stuck_at
     
     def remove_fault(self):
         self.stuck_at = None
-        self.state = 'X'
-    
+        self.state = X
+        self._touch()
+
     def make_faulty(self, stuck_at: int, set: bool=False):
         self.stuck_at = stuck_at
         if set:
             self.activate_fault()
 
     def reset(self):
-        self.state = 'X'
+        self.state = X
+        self._touch()
 
     def is_faulty(self):
         return self.stuck_at != None
 
     def is_fanout(self):
+        if self.circuit is not None:
+            return int(self.circuit.fanout_count[self.id]) > 1
         return len(self.gates) > 1
 
     def set_state(self, val):
-        if self.is_faulty() and val in ['D', '~D']:
-            raise ValueError(f"Trying to assign {val} to a faulty gate {self}")
-        if self.stuck_at == 0 and val == 1:
-            self.state = 'D'
-            return
-        if self.stuck_at == 1 and val == 0:
-            self.state = '~D'
-            return
-        self.state = val
+        circuit = self.circuit
+        if circuit is not None:
+            stuck_at = circuit.stuck_at[self.id]
+        else:
+            stuck_at = -1 if self._stuck_at is None else self._stuck_at
+        code = _SET_LUT[stuck_at + 1, val]
+        if code == 255:
+            raise ValueError(f"Trying to assign {STATE_NAMES[val]} to a faulty gate {self}")
+        self.state = int(code)
+        self._touch()
 
     def activate_fault(self):
         if self.is_faulty():
-            state = ['D', '~D']
+            state = (D, D_BAR)
             self.state = state[self.stuck_at]
-    
+            self._touch()
+
     def is_fault_activated(self):
         if not self.is_faulty():
             raise ValueError("Calling node.is_fault_activated on non_faulty node.")
-        state = ['D', '~D']
+        state = (D, D_BAR)
         return self.state == state[self.stuck_at]
 
     def is_po(self):
+        if self.circuit is not None:
+            return int(self.circuit.fanout_count[self.id]) == 0
         return len(self.gates) == 0
 
     def has_x_path(self):
         """Returns true if there is a path with only X's from this node to a PO."""
+        if self.circuit is not None:
+            # amortized over all queries via the circuit-level reachability cache
+            circuit = self.circuit
+            circuit.refresh_x_reach()
+            reach = circuit._x_reach
+            lo, hi = circuit.fanout_ptr[self.id], circuit.fanout_ptr[self.id + 1]
+            if lo == hi:  # PO
+                return bool(reach[self.id])
+            return bool(reach[circuit.fanout_idx[lo:hi]].any())
+
+        # fallback DFS for nodes not attached to a Circuit
         if self.is_po():
-            return self.state == 'X'
+            return self.state == X
 
-        explored = []
+        explored = set()
         # list of gates which have state X
-        to_explore = [gate.output for gate in self.gates if gate.output.state == 'X']
+        to_explore = [gate.output for gate in self.gates if gate.output.state == X]
         while len(to_explore) > 0:
             node = to_explore.pop(-1)   # dfs
-            explored.append(node)
+            if node in explored:
+                continue
+            explored.add(node)
             if node.is_po():
                 return True
             for gate in node.gates:
-                if gate.output.state == 'X':
+                if gate.output.state == X:
                     to_explore.append(gate.output)
         return False
 
     def is_pi(self):
+        if self.circuit is not None:
+            return bool(self.circuit.pi_mask[self.id])
         return self.gate_output == None
 
     def __repr__(self):
         start = "^" if self.is_pi() else ""
         end = "$" if self.is_po() else ""
-        return f"{start}{end}".ljust(1) + f"Node {self.name}".ljust(7) + ":" + f" {self.state}".rjust(3)
+        return "%-1s%-7s:%3s" % (
+            start + end, "Node %s" % self.name, " " + STATE_NAMES[self.state])
+
+
+# specialized fixed fan-in Gate subclasses, populated below the generic
+# subclasses: {(type, fanin): class}
+_FIXED_CLASSES = {}
 
 
 class Gate(Generic[GateType]):
@@ -178,27 +554,79 @@ class Gate(Generic[GateType]):
     Deals with 5 logic values:
     0, 1, X (undetermined), D (1 on good circuit, 0 on bad circuit) and ~D (not D)
     Inputs may have both X's and D's
+
+    States are encoded as small ints, see the ZERO/ONE/X/D/D_BAR constants above.
     """
-    name_counts = {
-        "not": 0,
-        "and": 0,
-        "nand": 0,
-        "or": 0,
-        "nor": 0,
-        "xor": 0,
-        "xnor": 0
-    }
+    __slots__ = ('control_value', 'type', '_name_num', 'inputs', 'output',
+                 'depth', '_unassigned_mask', '_input_pos_mask',
+                 '_cc_order_cache', '_propagate_fn', '_lut', '_type_id',
+                 '_kernel', '_in_buf', '_input_refs', '_in_ids')
+
+    # truth tables shared across gates, built lazily: {(type, fanin): uint8 array
+    # of size 5**fanin indexed by the inputs packed as base-5 digits}
+    _LUT = {}
+    # largest fan-in for which a full truth table is built (5**6 entries)
+    _LUT_MAX_FANIN = 6
 
     def __init__(self, type, *inputs: Node):
         self.control_value = -1     # will be set to 0 for and/nand, 1 for or/nor
         self.type = type
-        Gate.name_counts[type] += 1
-        self.name = f"{type}{Gate.name_counts[type]}"
+        self._name_num = next(_gate_counters[type])
         self.inputs = list(inputs)
-        for node in self.inputs:
+        # bitmask of input positions whose node is currently X, kept up to date
+        # by Node._touch via the per-node position masks
+        self._unassigned_mask = 0
+        self._input_pos_mask = {}
+        for i, node in enumerate(self.inputs):
             node.gates.append(self)
+            self._input_pos_mask[node] = self._input_pos_mask.get(node, 0) | (1 << i)
+            if node.state == X:
+                self._unassigned_mask |= 1 << i
+        self._cc_order_cache = {}  # (val, hardest) -> input positions by controllability
         self.output = Node(gate_output=self)  # will get set after propagate() is called
         self.depth = self.set_depth()  # max number of gates between this one and PIs
+        self._propagate_fn = {
+            "not": self.not_propagate,
+            "and": self.and_propagate,
+            "nand": self.nand_propagate,
+            "or": self.or_propagate,
+            "nor": self.nor_propagate,
+            "xor": self.xor_propagate,
+            "xnor": self.xnor_propagate,
+        }[type]
+        self._lut = self._build_lut()
+        self._type_id = GATE_TYPES.index(type)
+        self._kernel = _NB_KERNELS[self._type_id]
+        self._in_buf = np.empty(len(self.inputs), dtype=np.int8)
+        self._input_refs = tuple(self.inputs)  # faster to iterate than the list
+        self._in_ids = None  # int32 input node ids, set by Circuit.build_soa
+        # common small gates get a straight-line propagate
+        specialized = _FIXED_CLASSES.get((type, len(self.inputs)))
+        if specialized is not None:
+            self.__class__ = specialized
+
+    @property
+    def name(self):
+        # materialized on demand, only the per-type number is stored
+        return f"{self.type}{self._name_num}"
+
+    def _build_lut(self):
+        """
+        Returns the shared truth table for this gate's (type, fanin), building it
+        on first use by evaluating the propagate logic once per input combination.
+        Returns None for very wide gates, which keep the generic propagate path.
+        """
+        fanin = len(self.inputs)
+        if fanin > Gate._LUT_MAX_FANIN:
+            return None
+        key = (self.type, fanin)
+        table = Gate._LUT.get(key)
+        if table is None:
+            table = np.empty(5 ** fanin, dtype=np.uint8)
+            for packed, states in enumerate(itertools.product(range(5), repeat=fanin)):
+                table[packed] = self._propagate(list(states))
+            Gate._LUT[key] = table
+        return table
 
     def set_depth(self):
         """
@@ -207,68 +635,66 @@ class Gate(Generic[GateType]):
 
         Depth = max(depth of gates connected to inputs) + 1
         """
-        depth = 0
-        for input in self.inputs:
-            if input.is_pi():
-                continue
-            # the input is the output of some gate
-            if input.gate_output.depth > depth:
-                depth = input.gate_output.depth
-        return depth + 1
+        return max((inp.gate_output.depth for inp in self.inputs
+                    if inp.gate_output is not None), default=0) + 1
 
     def get_unassigned_inputs(self):
-        return [node for node in self.inputs if node.state == 'X']
+        return [node for node in self.inputs if node.state == X]
 
     def get_assigned_inputs(self):
-        return [node for node in self.inputs if node.state != 'X']
+        return [node for node in self.inputs if node.state != X]
+
+    def _controllable_order(self, val, hardest):
+        """
+        Input positions sorted by cc0 (val=0) or cc1 (val=1), hardest or
+        easiest first.  The sort is stable so ties keep input order, matching
+        what a linear scan over the inputs would return.  Cached until the
+        circuit recomputes controllability.
+        """
+        key = (val, hardest)
+        order = self._cc_order_cache.get(key)
+        if order is None:
+            if val == 0:
+                ccs = [inp.cc0 for inp in self.inputs]
+            else:
+                ccs = [inp.cc1 for inp in self.inputs]
+            if hardest:
+                order = sorted(range(len(self.inputs)), key=lambda i: -ccs[i])
+            else:
+                order = sorted(range(len(self.inputs)), key=lambda i: ccs[i])
+            self._cc_order_cache[key] = order
+        return order
 
     def get_hardest_controllable_input(self, val, unassigned=True):
         """Returns the input node to this gate that is the hardest to control.
         :param val: if 0, then get hardest cc0 controllability, else cc1
         """
-        inputs = []
-        if unassigned:
-            inputs = self.get_unassigned_inputs()
-        if len(inputs) == 0 or not unassigned:
-            inputs = self.inputs
-        maxm = 0
-        node = None
-        attribute = "cc0" if val == 0 else "cc1"
-        for inp in inputs:
-            controllability = getattr(inp, attribute)
-            if controllability > maxm:
-                node = inp
-                maxm = controllability
-        return node
+        order = self._controllable_order(val, hardest=True)
+        if unassigned and self._unassigned_mask:
+            for i in order:
+                if self._unassigned_mask >> i & 1:
+                    return self.inputs[i]
+        return self.inputs[order[0]]
 
     def get_easiest_controllable_input(self, val, unassigned=True):
         """Returns the input node to this gate that is the easiest to control.
         :param val: if 0, then get hardest cc0 controllability, else cc1
         """
-        inputs = []
-        if unassigned:
-            inputs = self.get_unassigned_inputs()
-        if len(inputs) == 0 or not unassigned:
-            inputs = self.inputs
-
-        minm = 100000
-        node = None
-        attribute = "cc0" if val == 0 else "cc1"
-        for inp in inputs:
-            controllability = getattr(inp, attribute)
-            if controllability < minm:
-                node = inp
-                minm = controllability
-        return node
+        order = self._controllable_order(val, hardest=False)
+        if unassigned and self._unassigned_mask:
+            for i in order:
+                if self._unassigned_mask >> i & 1:
+                    return self.inputs[i]
+        return self.inputs[order[0]]
 
     def is_on_d_frontier(self) -> bool:
         """In order to be true, the output must be X and there must be a D or ~D on the input."""
-        if self.output.state != 'X':
+        if self.output.state != X:
             return False
-        
+
         input_vals = [inp.state for inp in self.inputs]
 
-        if 'D' in input_vals or '~D' in input_vals:
+        if D in input_vals or D_BAR in input_vals:
             return True
         return False
 
@@ -279,10 +705,21 @@ class Gate(Generic[GateType]):
 
     def propagate(self, verbose=False):
         """Propagate the current value of the gate's input Node to the output Node."""
-        inputs = []
-        for node in self.inputs:
-            inputs.append(node.state)
-        output = self._propagate(inputs)
+        if self._lut is not None:
+            # single table lookup, inputs packed as base-5 digits
+            packed = 0
+            for node in self._input_refs:
+                packed = packed * 5 + node.state
+            output = int(self._lut[packed])
+        elif self._in_ids is not None:
+            # wide gate on an attached circuit: gather the states in one call
+            output = int(self._kernel(self.output.circuit.state[self._in_ids]))
+        else:
+            # wide detached gate: run the kernel on the preallocated buffer
+            buf = self._in_buf
+            for i, node in enumerate(self._input_refs):
+                buf[i] = node.state
+            output = int(self._kernel(buf))
         self.output.set_state(output)
 
         if verbose:
@@ -291,17 +728,10 @@ class Gate(Generic[GateType]):
 
     def _propagate(self, inputs):
         """Calls appropriate function"""
-        return getattr(self, f"{self.type}_propagate")(inputs)
+        return self._propagate_fn(inputs)
 
     def invert(self, val):
-        inverted = {
-            'X': 'X',
-            'D': '~D',
-            '~D': 'D',
-            0: 1,
-            1: 0,
-        }
-        return inverted[val]
+        return int(_INV[val])
 
     def not_propagate(self, inputs):
         assert len(inputs) == 1
@@ -310,56 +740,41 @@ class Gate(Generic[GateType]):
     def and_propagate(self, inputs):
         assert len(inputs) > 1
 
-        if 0 in inputs: # at least one 0
-            return 0
-
-        if all([x == 1 for x in inputs]): # all 1's
-            return 1
-
-        # if we get to here, we know there are no 0's, just 1, X, D, ~D
-
-        d_found = 'D' in inputs
-        d_prime_found = '~D' in inputs
-
-        if d_found and d_prime_found:
-            return 0
-
-        # if we get here, we know that there are not both D and ~D.  There also might be X's and 1's
-        if 'X' in inputs:
-            return 'X'
-
-        if d_found and not d_prime_found:
-            return 'D'
-        if not d_found and d_prime_found:
-            return '~D'
-
-        return 0
+        # one pass: bit s of the mask records whether state s appears
+        mask = 0
+        for s in inputs:
+            mask |= 1 << s
+
+        if mask & 1:                            # at least one 0
+            return ZERO
+        if mask == 2:                           # all 1's
+            return ONE
+        if (mask >> D) & (mask >> D_BAR) & 1:   # both D and ~D
+            return ZERO
+        if mask & (1 << X):                     # X's (and possibly 1's, D's or ~D's)
+            return X
+        if mask & (1 << D):                     # D's (and possibly 1's)
+            return D
+        return D_BAR                            # ~D's (and possibly 1's)
 
     def or_propagate(self, inputs):
         assert len(inputs) > 1
 
-        if 1 in inputs: # at least one 1
-            return 1
-
-        if not any(inputs): # all 0's
-            return 0
-
-        # if we get to here, we know there are no 1's, just 0, X, D, ~D
-
-        d_found = 'D' in inputs
-        d_prime_found = '~D' in inputs
-
-        if d_found and d_prime_found:      # there is at least one 1
-            return 1
-
-        if 'X' in inputs:       # covers X's and D's or X's and ~D's
-            return 'X'
-
-        if d_found:     # covers D's
-            return 'D'
-
-        # covers ~D's
-        return '~D'
+        mask = 0
+        for s in inputs:
+            mask |= 1 << s
+
+        if mask & 2:                            # at least one 1
+            return ONE
+        if mask == 1:                           # all 0's
+            return ZERO
+        if (mask >> D) & (mask >> D_BAR) & 1:   # both D and ~D, so at least one 1
+            return ONE
+        if mask & (1 << X):                     # X's (and possibly 0's, D's or ~D's)
+            return X
+        if mask & (1 << D):                     # D's (and possibly 0's)
+            return D
+        return D_BAR                            # ~D's (and possibly 0's)
 
     def nand_propagate(self, inputs):
         return self.invert(self.and_propagate(inputs))
@@ -368,58 +783,95 @@ class Gate(Generic[GateType]):
         return self.invert(self.or_propagate(inputs))
 
     def xor_propagate(self, inputs):
-        def xor_2inp(a, b):
-            first_and = self.and_propagate([a, self.invert(b)])
-            second_and = self.and_propagate([b, self.invert(a)])
-            return self.or_propagate([first_and, second_and])
-
-        val = inputs.pop(-1)
-
-        while len(inputs) > 0:
-            new_val = inputs.pop(-1)
-            val = xor_2inp(val, new_val)
-
-        return val
+        return int(functools.reduce(lambda a, b: _XOR2[a, b], inputs))
 
     def xnor_propagate(self, inputs):
         return self.invert(self.xor_propagate(inputs))
 
     def __repr__(self):
-        return f"Gate {self.name}".ljust(12) + f"(depth {self.depth}):".ljust(13) + \
-               f"{self.output}".ljust(13) + f" =   {self.type.upper()}".ljust(9) + f" {self.inputs}"
+        return "%-12s%-13s%-13s%-9s %s" % (
+            "Gate %s" % self.name, "(depth %d):" % self.depth, self.output,
+            " =   %s" % self.type.upper(), self.inputs)
 
 
 class Not(Gate):
+    __slots__ = ()
+
     def __init__(self, *inputs):
         super().__init__("not", *inputs)
 
 
 class And(Gate):
+    __slots__ = ()
+
     def __init__(self, *inputs):
         super().__init__("and", *inputs)
         self.control_value = 0
 
 
 class Or(Gate):
+    __slots__ = ()
+
     def __init__(self, *inputs):
         super().__init__("or", *inputs)
         self.control_value = 1
 
 class Nand(Gate):
+    __slots__ = ()
+
     def __init__(self, *inputs):
         super().__init__("nand", *inputs)
         self.control_value = 0
 
 
 class Nor(Gate):
+    __slots__ = ()
+
     def __init__(self, *inputs):
         super().__init__("nor", *inputs)
         self.control_value = 1
 
 class Xor(Gate):
+    __slots__ = ()
+
     def __init__(self, *inputs):
         super().__init__("xor", *inputs)
 
 class Xnor(Gate):
+    __slots__ = ()
+
     def __init__(self, *inputs):
         super().__init__("xnor", *inputs)
+
+
+def _make_fixed(base, arity):
+    """
+    Emits a subclass of `base` (e.g. And2 from And) whose propagate is
+    straight-line code for a fixed fan-in: the truth-table index is written
+    out literally, so the generic input-packing loop disappears.
+    """
+    states = [f"self._input_refs[{i}].state" for i in range(arity)]
+    packed = states[0]
+    for s in states[1:]:
+        packed = f"({packed}) * 5 + {s}"
+    name = f"{base.__name__}{arity}"
+    src = (
+        f"class {name}({base.__name__}):\n"
+        f"    __slots__ = ()\n"
+        f"    def propagate(self, verbose=False):\n"
+        f"        self.output.set_state(int(self._lut[{packed}]))\n"
+        f"        if verbose:\n"
+        f"            print(self)\n"
+        f"        return self.output.state\n"
+    )
+    namespace = {base.__name__: base}
+    exec(src, namespace)
+    return namespace[name]
+
+
+for _base, _type in ((Not, "not"), (And, "and"), (Nand, "nand"), (Or, "or"),
+                     (Nor, "nor"), (Xor, "xor"), (Xnor, "xnor")):
+    for _arity in ((1,) if _type == "not" else (2, 3)):
+        _cls = _make_fixed(_base, _arity)
+        _FIXED_CLASSES[(_type, _arity)] = _cls
+        globals()[_cls.__name__] = _cls